@@ -7,8 +7,10 @@ import os
 from pathlib import Path
 import uuid
 from datetime import datetime, timedelta
-import shutil
 import asyncio
+import functools
+import aiofiles
+from cachetools import TTLCache
 from pydantic import BaseModel
 
 # Import the document converter classes
@@ -27,6 +29,12 @@ CONVERTED_DIR = Path("converted")
 UPLOAD_DIR.mkdir(exist_ok=True)
 CONVERTED_DIR.mkdir(exist_ok=True)
 
+# Size of the chunks read from uploaded files (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# How long conversion statuses and files are kept (1 hour)
+RETENTION_SECONDS = 3600
+
 # Initialize the document converter
 converter = DocumentConverter()
 
@@ -44,35 +52,41 @@ class ConversionStatus(BaseModel):
     output_file: Optional[str] = None
     created_at: datetime
 
-# Store conversion statuses
-conversion_statuses = {}
+# Store conversion statuses, expiring them after the retention period
+conversion_statuses = TTLCache(maxsize=100_000, ttl=RETENTION_SECONDS)
+
+def schedule_removal(*paths: Path) -> None:
+    """Remove files once the retention period has passed"""
+    loop = asyncio.get_running_loop()
+    for path in paths:
+        loop.call_later(RETENTION_SECONDS, functools.partial(path.unlink, missing_ok=True))
 
 async def cleanup_old_files():
-    """Cleanup files older than 1 hour"""
-    while True:
-        current_time = datetime.now()
-        # Clean up files older than 1 hour
-        for directory in [UPLOAD_DIR, CONVERTED_DIR]:
-            for file_path in directory.glob("*"):
-                if file_path.is_file():
-                    file_age = current_time - datetime.fromtimestamp(file_path.stat().st_mtime)
-                    if file_age > timedelta(hours=1):
-                        file_path.unlink()
-        
-        # Clean up old conversion statuses
-        expired_conversions = [
-            conv_id for conv_id, status in conversion_statuses.items()
-            if (current_time - status.created_at) > timedelta(hours=1)
-        ]
-        for conv_id in expired_conversions:
-            conversion_statuses.pop(conv_id)
-        
-        await asyncio.sleep(3600)  # Run every hour
+    """Cleanup orphaned files older than 1 hour left behind by previous runs"""
+    current_time = datetime.now()
+    for directory in [UPLOAD_DIR, CONVERTED_DIR]:
+        for file_path in directory.glob("*"):
+            if file_path.is_file():
+                file_age = current_time - datetime.fromtimestamp(file_path.stat().st_mtime)
+                if file_age > timedelta(seconds=RETENTION_SECONDS):
+                    file_path.unlink(missing_ok=True)
 
 @app.on_event("startup")
 async def startup_event():
     """Start background cleanup task"""
-    asyncio.create_task(cleanup_old_files())
+    # Keep strong references so running tasks are not garbage collected
+    app.state.background_tasks = set()
+    task = asyncio.create_task(cleanup_old_files())
+    app.state.background_tasks.add(task)
+    task.add_done_callback(app.state.background_tasks.discard)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cancel background tasks"""
+    tasks = list(app.state.background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 @app.post("/convert/", response_model=ConversionResponse)
 async def convert_document(
@@ -105,27 +119,31 @@ async def convert_document(
     
     # Save uploaded file
     input_path = UPLOAD_DIR / f"{conversion_id}{input_extension}"
-    with open(input_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Scheduled up front so partial, failed and cancelled uploads are removed too
+    schedule_removal(input_path)
+    async with aiofiles.open(input_path, "wb") as buffer:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await buffer.write(chunk)
     
     # Generate output path
     output_path = CONVERTED_DIR / f"{conversion_id}{output_format}"
     
     # Store conversion status
-    conversion_statuses[conversion_id] = ConversionStatus(
+    status = ConversionStatus(
         conversion_id=conversion_id,
         status="processing",
         input_file=file.filename,
         created_at=datetime.now()
     )
+    conversion_statuses[conversion_id] = status
     
     try:
-        # Perform conversion
-        converter.convert(str(input_path), str(output_path))
+        # Perform conversion off the event loop
+        await asyncio.to_thread(converter.convert, str(input_path), str(output_path))
         
         # Update conversion status
-        conversion_statuses[conversion_id].status = "completed"
-        conversion_statuses[conversion_id].output_file = output_path.name
+        status.status = "completed"
+        status.output_file = output_path.name
         
         return ConversionResponse(
             message="Document conversion started",
@@ -135,41 +153,43 @@ async def convert_document(
     
     except Exception as e:
         # Update conversion status
-        conversion_statuses[conversion_id].status = "failed"
+        status.status = "failed"
         
         # Clean up files
-        if input_path.exists():
-            input_path.unlink()
-        if output_path.exists():
-            output_path.unlink()
+        input_path.unlink(missing_ok=True)
+        output_path.unlink(missing_ok=True)
         
         raise HTTPException(
             status_code=500,
             detail=f"Conversion failed: {str(e)}"
         )
+    
+    finally:
+        schedule_removal(output_path)
 
 @app.get("/status/{conversion_id}", response_model=ConversionStatus)
 async def get_conversion_status(conversion_id: str):
     """Get the status of a conversion"""
-    if conversion_id not in conversion_statuses:
+    status = conversion_statuses.get(conversion_id)
+    if status is None:
         raise HTTPException(
             status_code=404,
             detail="Conversion ID not found"
         )
     
-    return conversion_statuses[conversion_id]
+    return status
 
 @app.get("/download/{conversion_id}")
 async def download_converted_file(conversion_id: str):
     """Download the converted file"""
     # Check if conversion exists and is completed
-    if conversion_id not in conversion_statuses:
+    status = conversion_statuses.get(conversion_id)
+    if status is None:
         raise HTTPException(
             status_code=404,
             detail="Conversion ID not found"
         )
     
-    status = conversion_statuses[conversion_id]
     if status.status != "completed":
         raise HTTPException(
             status_code=400,
@@ -177,14 +197,18 @@ async def download_converted_file(conversion_id: str):
         )
     
     output_file = CONVERTED_DIR / status.output_file
-    if not output_file.exists():
+    try:
+        stat_result = output_file.stat()
+    except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail="Converted file not found"
         )
     
+    # Reuse the stat result so the response does not stat the file again
     return FileResponse(
         path=output_file,
+        stat_result=stat_result,
         filename=f"converted_{status.input_file}{Path(status.output_file).suffix}",
         media_type="application/octet-stream"
     )
@@ -198,4 +222,14 @@ async def get_supported_formats():
     }
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
+    # Conversion statuses live in process memory, so running more than one
+    # worker needs a shared status store before /status and /download work
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    reload = os.getenv("ENV") == "dev"
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=1 if reload else workers,
+        reload=reload
+    )
@@ -3,6 +3,9 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Dict, Type, List, Tuple
+from collections import Counter, OrderedDict
+import hashlib
+import threading
 
 import docx
 from docx.document import Document
@@ -11,9 +14,16 @@ from docx.text.run import Run
 import pdfplumber
 import re
 from dataclasses import dataclass
-from collections import defaultdict
 
-@dataclass
+# Markdown emphasis marker for each (bold, italic) combination
+_EMPHASIS_MARKERS = {
+    (False, False): '',
+    (True, False): '**',
+    (False, True): '*',
+    (True, True): '***',
+}
+
+@dataclass(slots=True)
 class TextElement:
     """Represents a text element with its formatting properties"""
     text: str
@@ -48,35 +58,62 @@ class DocumentWriter(ABC):
 class DocxReader(DocumentReader):
     """Reader for DOCX files."""
     
+    # Maximum number of formatted runs kept in the run cache
+    RUN_CACHE_SIZE = 4096
+    
+    def __init__(self):
+        self._run_cache: Dict[Tuple[str, bool, bool, bool], str] = {}
+        self._style_cache: Dict[str, Tuple[str, int]] = {}
+    
     def _process_run(self, run: Run) -> str:
         """Process a run and apply appropriate formatting."""
-        text = run.text
+        key = (run.text, bool(run.bold), bool(run.italic), bool(run.underline))
+        cached = self._run_cache.get(key)
+        if cached is not None:
+            return cached
         
-        if run.bold:
+        text, bold, italic, underline = key
+        if bold:
             text = f"**{text}**"
-        if run.italic:
+        if italic:
             text = f"*{text}*"
-        if run.underline:
+        if underline:
             text = f"__{text}__"
         
+        # Evict the oldest entry once the cache is full
+        if len(self._run_cache) >= self.RUN_CACHE_SIZE:
+            del self._run_cache[next(iter(self._run_cache))]
+        self._run_cache[key] = text
         return text
 
+    def _classify_style(self, style_name: str) -> Tuple[str, int]:
+        """Classify a paragraph style as a heading (with level), list or body."""
+        kind = self._style_cache.get(style_name)
+        if kind is None:
+            style = style_name.lower()
+            if style.startswith('heading') and style[-1].isdigit():
+                kind = ('heading', int(style[-1]))
+            elif style.startswith('list'):
+                kind = ('list', 0)
+            else:
+                kind = ('body', 0)
+            self._style_cache[style_name] = kind
+        return kind
+
     def _process_paragraph(self, paragraph: Paragraph) -> str:
         """Process a paragraph and apply appropriate formatting."""
         if not paragraph.text.strip():
             return "\n"
         
         # Handle different paragraph styles
-        style = paragraph.style.name.lower()
+        kind, level = self._classify_style(paragraph.style.name)
         content = "".join(self._process_run(run) for run in paragraph.runs)
         
-        if style.startswith('heading'):
-            level = style[-1]
-            if level.isdigit():
-                return f"{'#' * int(level)} {content}\n\n"
+        if kind == 'heading':
+            return f"{'#' * level} {content}\n\n"
         
         # Handle lists
-        if paragraph.style.name.lower().startswith('list'):
+        if kind == 'list':
             return f"* {content}\n"
         
         return f"{content}\n\n"
@@ -85,12 +122,12 @@ class DocxReader(DocumentReader):
         """Read DOCX file and convert to intermediate format (Markdown)."""
         try:
             doc: Document = docx.Document(file_path)
-            content = ""
+            parts = []
             
             for paragraph in doc.paragraphs:
-                content += self._process_paragraph(paragraph)
+                parts.append(self._process_paragraph(paragraph))
             
-            return content.strip()
+            return "".join(parts).strip()
         except Exception as e:
             raise Exception(f"Error reading DOCX file: {str(e)}")
 
@@ -99,43 +136,32 @@ class PdfReader(DocumentReader):
     """Reader for PDF files"""
     
     def __init__(self):
-        self.font_sizes = []
         self.header_sizes = set()
+        self.header_prefixes = {}
     
-    def _analyze_font_sizes(self, pages):
+    def _analyze_font_sizes(self, size_counts: Counter):
         """Analyze font sizes to determine header levels"""
-        sizes = defaultdict(int)
-        for page in pages:
-            chars = page.chars
-            for char in chars:
-                if char['size'] is not None:
-                    sizes[char['size']] += 1
-        
         # Get sorted unique font sizes
-        unique_sizes = sorted(sizes.keys(), reverse=True)
+        unique_sizes = sorted(size_counts, reverse=True)
         
         # Consider the top 3 largest sizes as potential headers
         self.header_sizes = set(unique_sizes[:3])
-        self.font_sizes = unique_sizes
-    
-    def _get_header_level(self, font_size: float) -> int:
-        """Determine header level based on font size"""
-        if font_size in self.header_sizes:
-            return self.font_sizes.index(font_size) + 1
-        return 0
+        # Markdown prefix for each header size, e.g. "## "
+        self.header_prefixes = {
+            size: f"{'#' * level} " for level, size in enumerate(unique_sizes[:3], start=1)
+        }
     
-    def _extract_text_elements(self, page) -> List[TextElement]:
-        """Extract text elements with formatting from a page"""
-        elements = []
-        
-        # First, get all text with position and formatting
-        words = page.extract_words(
+    def _extract_words(self, page) -> List[dict]:
+        """Extract words with position and formatting from a page"""
+        return page.extract_words(
             keep_blank_chars=True,
             extra_attrs=['fontname', 'size', 'stroking_color', 'non_stroking_color']
         )
-        
+    
+    def _extract_text_elements(self, words: List[dict]) -> List[TextElement]:
+        """Build text elements with formatting from a page's words"""
+        elements = []
         current_line_y = None
-        current_line_elements = []
         
         for word in words:
             # Create text element
@@ -160,17 +186,10 @@ class PdfReader(DocumentReader):
             
             # If vertical position difference is significant, treat as new line
             if abs(element.top - current_line_y) > element.height * 0.5:
-                if current_line_elements:
-                    elements.extend(current_line_elements)
-                    elements.append(TextElement('\n', 0))
-                current_line_elements = []
+                elements.append(TextElement('\n', 0))
                 current_line_y = element.top
             
-            current_line_elements.append(element)
-        
-        # Add last line
-        if current_line_elements:
-            elements.extend(current_line_elements)
+            elements.append(element)
         
         return elements
     
@@ -192,15 +211,10 @@ class PdfReader(DocumentReader):
             
             # Apply formatting
             if element.is_header:
-                level = self._get_header_level(element.font_size)
-                text = f"{'#' * level} {text}"
+                text = f"{self.header_prefixes[element.font_size]}{text}"
             else:
-                if element.bold and element.italic:
-                    text = f"***{text}***"
-                elif element.bold:
-                    text = f"**{text}**"
-                elif element.italic:
-                    text = f"*{text}*"
+                marker = _EMPHASIS_MARKERS[element.bold, element.italic]
+                text = f"{marker}{text}{marker}"
             
             current_line.append(text)
         
@@ -214,16 +228,23 @@ class PdfReader(DocumentReader):
     
     def read(self, file_path: str) -> str:
         with pdfplumber.open(file_path) as pdf:
-            # First pass: analyze font sizes
-            self._analyze_font_sizes(pdf.pages)
+            # Single pass over the pages: collect words and their font sizes
+            page_words = []
+            size_counts = Counter()
+            for page in pdf.pages:
+                words = self._extract_words(page)
+                page_words.append(words)
+                size_counts.update(w['size'] for w in words if w['size'] is not None)
+            
+            self._analyze_font_sizes(size_counts)
             
-            # Second pass: extract and format text
+            # Format the collected words
             all_elements = []
-            for page in pdf.pages:
-                elements = self._extract_text_elements(page)
+            for page_number, words in enumerate(page_words, start=1):
+                elements = self._extract_text_elements(words)
                 all_elements.extend(elements)
                 # Add page break if not last page
-                if page.page_number < len(pdf.pages):
+                if page_number < len(page_words):
                     all_elements.append(TextElement('\n', 0))
             
             return self._elements_to_markdown(all_elements)
@@ -244,7 +265,12 @@ class MarkdownWriter(DocumentWriter):
 class DocumentConverter:
     """Main converter class that orchestrates the conversion process."""
     
+    # Maximum number of converted documents kept in the content cache
+    CACHE_SIZE = 64
+    
     def __init__(self):
+        self._cache: OrderedDict[Tuple[str, str], str] = OrderedDict()
+        self._cache_lock = threading.Lock()
         self.readers: Dict[str, Type[DocumentReader]] = {
             '.docx': DocxReader,
             '.pdf': PdfReader
@@ -256,11 +282,43 @@ class DocumentConverter:
     def register_reader(self, extension: str, reader: Type[DocumentReader]) -> None:
         """Register a new document reader."""
         self.readers[extension] = reader
+        self.clear_cache()
     
     def register_writer(self, extension: str, writer: Type[DocumentWriter]) -> None:
         """Register a new document writer."""
         self.writers[extension] = writer
     
+    def clear_cache(self) -> None:
+        """Drop all cached reader results."""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        """Return the SHA-256 hex digest of a file's content."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _read_cached(self, input_path: str, input_ext: str) -> str:
+        """Read a document, reusing the result for previously seen content."""
+        key = (input_ext, self._hash_file(input_path))
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        
+        content = self.readers[input_ext]().read(input_path)
+        
+        with self._cache_lock:
+            self._cache[key] = content
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return content
+    
     def convert(self, input_path: str, output_path: str) -> None:
         """Convert a document from one format to another."""
         input_ext = Path(input_path).suffix.lower()
@@ -274,10 +332,9 @@ class DocumentConverter:
         if output_ext not in self.writers:
             raise ValueError(f"Unsupported output format: {output_ext}")
         
-        # Create reader and writer instances
-        reader = self.readers[input_ext]()
+        # Create writer instance
         writer = self.writers[output_ext]()
         
         # Perform conversion
-        content = reader.read(input_path)
+        content = self._read_cached(input_path, input_ext)
         writer.write(content, output_path)
@@ -3,22 +3,34 @@ import os
 from urllib.parse import urlparse
 from datetime import datetime
 from pathlib import Path
-import requests
+import asyncio
+import aiofiles
+import aiohttp
 from bs4 import BeautifulSoup
 import html2text
-import time
+
+# Precompiled patterns
+_INVALID_FN = re.compile(r'[<>:"/\\|?*]')
+_MULTI_DASH = re.compile(r'-+')
+_ARTICLE_RE = re.compile(r'article|post|entry|content')
+_EMPTY_LINES = re.compile(r'\n\s*\n')
+_HTML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+
+# Maximum number of links fetched at once, and per host
+MAX_CONCURRENT_REQUESTS = 10
+MAX_REQUESTS_PER_HOST = 2
 
 def sanitize_filename(title):
     """Convert a string into a safe filename."""
     # Remove or replace invalid filename characters
-    sanitized = re.sub(r'[<>:"/\\|?*]', '', title)
+    sanitized = _INVALID_FN.sub('', title)
     # Replace spaces with dashes
     sanitized = sanitized.replace(' ', '-')
     # Remove any multiple dashes
-    sanitized = re.sub(r'-+', '-', sanitized)
+    sanitized = _MULTI_DASH.sub('-', sanitized)
     return sanitized.strip('-')
 
-def extract_article_content(url):
+async def extract_article_content(session, url):
     """Extract and convert article content to markdown."""
     try:
         # Add headers to mimic a browser request
@@ -27,11 +39,12 @@ def extract_article_content(url):
         }
         
         # Fetch the webpage
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        async with session.get(url, headers=headers) as response:
+            response.raise_for_status()
+            html = await response.read()
         
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # Parse the raw bytes with lxml, letting it detect the charset
+        soup = BeautifulSoup(html, 'lxml')
         
         # Remove unwanted elements
         for element in soup.find_all(['script', 'style', 'nav', 'footer', 'iframe']):
@@ -43,8 +56,8 @@ def extract_article_content(url):
         # Common article containers
         possible_article_elements = [
             soup.find('article'),
-            soup.find(class_=re.compile(r'article|post|entry|content')),
-            soup.find(id=re.compile(r'article|post|entry|content')),
+            soup.find(class_=_ARTICLE_RE),
+            soup.find(id=_ARTICLE_RE),
             soup.find('main'),
         ]
         
@@ -68,27 +81,20 @@ def extract_article_content(url):
         
         # Clean up the markdown
         # Remove excessive newlines
-        markdown_content = re.sub(r'\n\s*\n', '\n\n', markdown_content)
+        markdown_content = _EMPTY_LINES.sub('\n\n', markdown_content)
         # Remove any remaining HTML comments
-        markdown_content = re.sub(r'<!--.*?-->', '', markdown_content, flags=re.DOTALL)
+        markdown_content = _HTML_COMMENT.sub('', markdown_content)
         
         return markdown_content.strip()
         
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         return f"Error fetching content: {str(e)}"
     except Exception as e:
         return f"Error processing content: {str(e)}"
 
-def process_links(input_file, output_dir):
-    """Process each link from the input file and create individual markdown notes."""
-    # Create output directory if it doesn't exist
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-    
-    with open(input_file, 'r') as f:
-        # Read all lines and filter out empty ones
-        links = [line.strip() for line in f.readlines() if line.strip()]
-    
-    for link in links:
+async def process_link(session, semaphore, link, output_dir):
+    """Fetch a single link and write it out as a markdown note."""
+    async with semaphore:
         try:
             # Parse the URL to get the domain and path
             parsed_url = urlparse(link)
@@ -104,7 +110,7 @@ def process_links(input_file, output_dir):
             
             print(f"Processing: {link}")
             # Extract article content
-            article_content = extract_article_content(link)
+            article_content = await extract_article_content(session, link)
             
             # Create markdown content
             content = f"""---
@@ -124,20 +130,37 @@ source: {parsed_url.netloc}
             
             # Write to file
             output_path = os.path.join(output_dir, filename)
-            with open(output_path, 'w', encoding='utf-8') as note_file:
-                note_file.write(content)
+            async with aiofiles.open(output_path, 'w', encoding='utf-8') as note_file:
+                await note_file.write(content)
             
             print(f"Created note: {filename}")
             
-            # Add a small delay between requests to be polite to servers
-            time.sleep(2)
-            
         except Exception as e:
             print(f"Error processing link: {link}")
             print(f"Error details: {str(e)}")
 
+async def process_links(input_file, output_dir):
+    """Process each link from the input file and create individual markdown notes."""
+    # Create output directory if it doesn't exist
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    
+    with open(input_file, 'r') as f:
+        # Read all lines and filter out empty ones
+        links = [line.strip() for line in f.readlines() if line.strip()]
+    
+    # Fetch links concurrently, limiting connections per host to stay polite to servers
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_REQUESTS_PER_HOST)
+    timeout = aiohttp.ClientTimeout(sock_connect=10, sock_read=10)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [
+            asyncio.create_task(process_link(session, semaphore, link, output_dir))
+            for link in links
+        ]
+        await asyncio.gather(*tasks)
+
 if __name__ == "__main__":
     # Example usage
     input_file = "links.txt"  # Your text file containing links
     output_dir = "notes"      # Directory where markdown files will be created
-    process_links(input_file, output_dir)
+    asyncio.run(process_links(input_file, output_dir))